@@ -2,22 +2,33 @@
 preprocess.py — One-time pipeline that converts the raw Volve CSV into JSON
 for the Next.js dashboard. Run from the project root:
 
-    python preprocessing/preprocess.py
+    python preprocessing/preprocess.py [--no-cache]
+
+The loaded time log is cached as Parquet under preprocessing/cache/ and reused
+while it is newer than both the raw CSV and src/data_loader.py; pass --no-cache
+to force a full reparse.
 
 Outputs written to web/public/data/: telemetry.json, events.json, metadata.json
 """
 
 from __future__ import annotations
 
-import json
+import argparse
 import logging
+import os
 import sys
 from pathlib import Path
 
 import numpy as np
+import orjson
+import pandas as pd
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Persist compiled Numba kernels between runs (must be set before numba is imported)
+os.environ.setdefault("NUMBA_CACHE_DIR", str(Path(__file__).parent / ".numba_cache"))
+
+import src.data_loader
 from src.data_loader import load_time_log
 from src.detection import (
     compute_signals,
@@ -41,42 +52,84 @@ RAW_CSV = (
 )
 OUT_DIR = Path(__file__).parent.parent / "web" / "public" / "data"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
+# Bump when the cached frame's schema changes without a data_loader.py edit
+_CACHE_VERSION = 1
+CACHE_PATH = Path(__file__).parent / "cache" / f"telemetry_raw.v{_CACHE_VERSION}.parquet"
 
 # Keep every N-th row in the telemetry JSON payload
 DOWNSAMPLE_N = 2
 
 
-def _json_safe(obj):
-    """Serialise numpy scalars for JSON (called by default= for unknown types)."""
-    if isinstance(obj, (np.integer,)):
-        return int(obj)
-    if isinstance(obj, np.floating):
-        return None if (obj != obj) else round(float(obj), 5)
-    if isinstance(obj, np.ndarray):
-        return obj.tolist()
-    raise TypeError(f"Not serialisable: {type(obj)}")
+def _write_json(path: Path, obj, *, indent: bool = False) -> None:
+    """
+    Serialise obj with orjson in one buffer and atomically swap it into place,
+    so the dashboard never reads a partially written file.
+    """
+    option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_bytes(orjson.dumps(obj, option=option))
+    tmp.replace(path)
 
 
-def _sanitize(obj):
+def _cache_is_fresh() -> bool:
     """
-    Recursively replace Python float NaN/Inf with None so that
-    json.dump produces valid JSON (NaN is not valid in JSON).
+    True if the Parquet cache postdates both the raw CSV and the loader that
+    produced it. A missing CSV does not invalidate an existing cache.
     """
-    if isinstance(obj, list):
-        return [_sanitize(v) for v in obj]
-    if isinstance(obj, dict):
-        return {k: _sanitize(v) for k, v in obj.items()}
-    if isinstance(obj, float) and (obj != obj or obj == float("inf") or obj == float("-inf")):
-        return None
-    return obj
+    if not CACHE_PATH.exists():
+        return False
+    sources = [Path(src.data_loader.__file__), RAW_CSV]
+    cached_at = CACHE_PATH.stat().st_mtime
+    return all(cached_at > p.stat().st_mtime for p in sources if p.exists())
+
 
+def _load_telemetry(use_cache: bool) -> pd.DataFrame:
+    """Load the time log, reusing the Parquet cache while it is still fresh."""
+    if use_cache and _cache_is_fresh():
+        logger.info("Loading cached time log: %s", CACHE_PATH)
+        return pd.read_parquet(CACHE_PATH, engine="pyarrow")
 
-def main() -> None:
+    df = load_time_log(RAW_CSV)
+    if use_cache:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(CACHE_PATH, compression="snappy", engine="pyarrow")
+        logger.info("Cached time log → %s", CACHE_PATH)
+    return df
+
+
+def _event_peak_rows(event_ids: np.ndarray, css: np.ndarray) -> np.ndarray:
+    """
+    Row of each event's CSS peak, in event_id order (0 = no event).
+
+    With event rows ordered by event_id, the per-event maxima come from one
+    reduceat pass; the first row matching its event's maximum is the peak
+    (same NaN-skipping and tie-breaking as a per-event idxmax).
+    """
+    rows = np.flatnonzero(event_ids > 0)
+    rows = rows[np.argsort(event_ids[rows], kind="stable")]
+    ids = event_ids[rows]
+    css_ev = css[rows]
+    is_start = np.diff(ids, prepend=0) != 0
+    starts = np.flatnonzero(is_start)
+    peak = np.fmax.reduceat(css_ev, starts) if len(starts) else css_ev[:0]
+    hits = np.flatnonzero(css_ev == peak[np.cumsum(is_start) - 1])
+    return rows[hits[np.searchsorted(hits, starts)]]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert the raw Volve CSV into JSON for the dashboard.",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="ignore and do not write the Parquet time-log cache",
+    )
+    args = parser.parse_args(argv)
 
     # -----------------------------------------------------------------------
     # 1. Load
     # -----------------------------------------------------------------------
-    df = load_time_log(RAW_CSV)
+    df = _load_telemetry(use_cache=not args.no_cache)
 
     # -----------------------------------------------------------------------
     # 2. Detect
@@ -98,17 +151,13 @@ def main() -> None:
     # Simulate physics response under controller setpoints
     sim_df = simulate_drillstring_response(ctrl_df, df, cfg)
 
-    # Merge controller outputs onto telemetry
-    df = df.merge(
-        ctrl_df[["time_s", "state", "wob_setpoint", "rpm_setpoint"]],
-        on="time_s",
-        how="left",
-    )
-    df = df.merge(
-        sim_df[["time_s", "sim_rpm", "sim_torque", "sim_rop"]],
-        on="time_s",
-        how="left",
-    )
+    # Attach controller outputs to telemetry. Both frames are row-aligned with df
+    # (the controller walks df in order and the simulator left-joins onto ctrl_df),
+    # so columns are assigned positionally instead of hash-joining on time_s.
+    for col in ("state", "wob_setpoint", "rpm_setpoint"):
+        df[col] = ctrl_df[col].to_numpy()
+    for col in ("sim_rpm", "sim_torque", "sim_rop"):
+        df[col] = sim_df[col].to_numpy()
 
     # -----------------------------------------------------------------------
     # 4. Telemetry JSON
@@ -136,49 +185,71 @@ def main() -> None:
         if col in out.columns:
             out[col] = out[col].astype(int)
 
-    records = _sanitize(out.to_dict(orient="records"))
+    # Column-oriented payload {col: [values...]}: numeric columns go to orjson as
+    # numpy arrays (NaN/Inf → null), string columns as plain lists
+    payload = {
+        col: (
+            np.ascontiguousarray(out[col].to_numpy())
+            if out[col].dtype.kind in "biuf"
+            else out[col].tolist()
+        )
+        for col in out.columns
+    }
 
     out_telem = OUT_DIR / "telemetry.json"
-    with open(out_telem, "w") as f:
-        json.dump(records, f, default=_json_safe, separators=(",", ":"))
+    _write_json(out_telem, payload)
     logger.info("Wrote telemetry.json | %d rows | %.1f MB",
-                len(records), out_telem.stat().st_size / 1e6)
+                len(out), out_telem.stat().st_size / 1e6)
 
     # -----------------------------------------------------------------------
     # 5. Events JSON
     # -----------------------------------------------------------------------
     logger.info("Serialising events JSON…")
 
-    events_data: list[dict] = []
-    max_event = int(df["event_id"].max())
-    for eid in range(1, max_event + 1):
-        seg = df[df["event_id"] == eid]
-        if seg.empty:
-            continue
-        events_data.append({
-            "event_id": int(eid),
-            "start_elapsed_s": round(float(seg["elapsed_s"].iloc[0]), 1),
-            "end_elapsed_s": round(float(seg["elapsed_s"].iloc[-1]), 1),
-            "duration_s": round(float(seg["elapsed_s"].iloc[-1] - seg["elapsed_s"].iloc[0]), 1),
-            "depth_m": round(float(seg["bit_depth_m"].mean()), 1),
-            "peak_css": round(float(seg["css"].max()), 4),
-            "mean_css": round(float(seg["css"].mean()), 4),
-            "severity": str(seg.loc[seg["css"].idxmax(), "severity_label"]),
-            "mean_wob_kkgf": round(float(seg["wob_kkgf"].mean()), 3),
-            "mean_rpm": round(float(seg["rpm"].mean()), 1),
+    # One grouped pass computes every per-event statistic
+    has_setpoint = "wob_setpoint" in df.columns
+    spec = dict(
+        start=("elapsed_s", "first"),
+        end=("elapsed_s", "last"),
+        depth=("bit_depth_m", "mean"),
+        peak_css=("css", "max"),
+        mean_css=("css", "mean"),
+        wob=("wob_kkgf", "mean"),
+        rpm=("rpm", "mean"),
+        peak_mwd=("mwd_ss_pktopk", "max"),
+    )
+    if has_setpoint:
+        spec["wob_setpoint"] = ("wob_setpoint", "mean")
+    ev = df[df["event_id"] > 0].groupby("event_id", sort=True).agg(**spec)
+
+    # Severity at each event's CSS peak
+    peak_rows = _event_peak_rows(df["event_id"].to_numpy(), df["css"].to_numpy())
+    severity = df["severity_label"].to_numpy()[peak_rows]
+
+    events_data: list[dict] = [
+        {
+            "event_id": int(e.Index),
+            "start_elapsed_s": round(float(e.start), 1),
+            "end_elapsed_s": round(float(e.end), 1),
+            "duration_s": round(float(e.end - e.start), 1),
+            "depth_m": round(float(e.depth), 1),
+            "peak_css": round(float(e.peak_css), 4),
+            "mean_css": round(float(e.mean_css), 4),
+            "severity": str(sev),
+            "mean_wob_kkgf": round(float(e.wob), 3),
+            "mean_rpm": round(float(e.rpm), 1),
             "peak_mwd_pktopk": (
-                round(float(seg["mwd_ss_pktopk"].max()), 1)
-                if seg["mwd_ss_pktopk"].notna().any() else None
+                round(float(e.peak_mwd), 1) if not np.isnan(e.peak_mwd) else None
             ),
             "wob_reduction_kkgf": (
-                round(float(seg["wob_kkgf"].mean() - seg["wob_setpoint"].mean()), 3)
-                if "wob_setpoint" in seg.columns else None
+                round(float(e.wob - e.wob_setpoint), 3) if has_setpoint else None
             ),
-        })
+        }
+        for e, sev in zip(ev.itertuples(), severity)
+    ]
 
     out_events = OUT_DIR / "events.json"
-    with open(out_events, "w") as f:
-        json.dump(events_data, f, default=_json_safe, separators=(",", ":"))
+    _write_json(out_events, events_data)
     logger.info("Wrote events.json | %d events", len(events_data))
 
     # -----------------------------------------------------------------------
@@ -186,8 +257,19 @@ def main() -> None:
     # -----------------------------------------------------------------------
     logger.info("Serialising metadata JSON…")
 
-    nominal_wob = float(df["wob_kkgf"].median())
-    nominal_rpm = float(df["rpm"].median())
+    # Every column statistic in one aggregation call
+    stats = df.agg({
+        "bit_depth_m": ["min", "max"],
+        "time_s": ["min", "max"],
+        "mwd_ss_pktopk": ["max"],
+        "wob_kkgf": ["median"],
+        "rpm": ["median"],
+    })
+    nominal_wob = float(stats.at["median", "wob_kkgf"])
+    nominal_rpm = float(stats.at["median", "rpm"])
+
+    labels, counts = np.unique(severity.astype(str), return_counts=True)
+    severity_counts = dict(zip(labels.tolist(), counts.tolist()))
 
     metadata = {
         "well": "15/9-F-9 A",
@@ -196,22 +278,18 @@ def main() -> None:
         "license": "NPD Open Government Data",
         "section": '12.25 in',
         "depth_range_m": [
-            round(float(df["bit_depth_m"].min()), 1),
-            round(float(df["bit_depth_m"].max()), 1),
+            round(float(stats.at["min", "bit_depth_m"]), 1),
+            round(float(stats.at["max", "bit_depth_m"]), 1),
         ],
         "drilling_days": round(
-            float((df["time_s"].max() - df["time_s"].min()) / 86400), 1
+            float((stats.at["max", "time_s"] - stats.at["min", "time_s"]) / 86400), 1
         ),
         "on_bottom_samples": len(df),
-        "downsampled_samples": len(records),
+        "downsampled_samples": len(out),
         "n_events": len(events_data),
-        "severe_events": int(
-            sum(1 for e in events_data if e["severity"] == "SEVERE")
-        ),
-        "moderate_events": int(
-            sum(1 for e in events_data if e["severity"] == "MODERATE")
-        ),
-        "mwd_max_pktopk_rpm": round(float(df["mwd_ss_pktopk"].max()), 1),
+        "severe_events": severity_counts.get("SEVERE", 0),
+        "moderate_events": severity_counts.get("MODERATE", 0),
+        "mwd_max_pktopk_rpm": round(float(stats.at["max", "mwd_ss_pktopk"]), 1),
         "key_insight": (
             "Surface RPM variation during MWD-confirmed stick-slip events was "
             "±1 rpm while downhole PKtoPK oscillation reached 381 rpm — a "
@@ -244,8 +322,7 @@ def main() -> None:
     }
 
     out_meta = OUT_DIR / "metadata.json"
-    with open(out_meta, "w") as f:
-        json.dump(metadata, f, default=_json_safe, indent=2)
+    _write_json(out_meta, metadata, indent=True)
     logger.info("Wrote metadata.json")
 
     # -----------------------------------------------------------------------
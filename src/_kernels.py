@@ -0,0 +1,290 @@
+"""
+_kernels.py — Numba rolling-window kernels for the detection pipeline.
+
+Streaming replacements for the pandas rolling aggregations used by
+detection.compute_signals and detection.detect_events. Semantics match
+``Series.rolling(w, min_periods=min_p)`` over a trailing window: NaNs are
+skipped, and a window yields NaN until it holds at least ``min_p`` valid samples.
+Outputs keep the input dtype (float32 in the pipeline); running state is
+kept in float64.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, error_model="numpy")
+def rolling_mean_std(x, w, min_p):
+    """
+    Rolling mean and sample std (ddof=1) in one Welford pass.
+
+    Running mean and sum of squared deviations are updated in O(1) as each
+    sample enters and leaves the window, which avoids the cancellation of the
+    sum-of-squares shortcut on offset signals. As in pandas, a window whose
+    valid samples are all the same value reports exactly 0. std is NaN
+    wherever fewer than two samples are in the window.
+    """
+    n = x.shape[0]
+    mean = np.full(n, np.nan, dtype=x.dtype)
+    std = np.full(n, np.nan, dtype=x.dtype)
+    m = 0.0
+    ssqd = 0.0
+    cnt = 0
+    prev = np.nan
+    n_same = 0              # trailing run of identical valid samples
+    for i in range(n):
+        v = np.float64(x[i])
+        if not np.isnan(v):
+            cnt += 1
+            delta = v - m
+            m += delta / cnt
+            ssqd += delta * (v - m)
+            n_same = n_same + 1 if v == prev else 1
+            prev = v
+        if i >= w:
+            old = np.float64(x[i - w])
+            if not np.isnan(old):
+                cnt -= 1
+                if cnt == 0:
+                    m = 0.0
+                    ssqd = 0.0
+                else:
+                    delta = old - m
+                    m -= delta / cnt
+                    ssqd -= delta * (old - m)
+        if cnt >= min_p and cnt > 0:
+            mean[i] = m
+            if cnt > 1:
+                if n_same >= cnt:
+                    std[i] = 0.0
+                else:
+                    std[i] = np.sqrt(ssqd / (cnt - 1)) if ssqd > 0.0 else 0.0
+    return mean, std
+
+
+@njit(cache=True)
+def run_length(flag):
+    """
+    Length of the run of consecutive True values ending at each sample.
+
+    ``run_length(f) >= w`` is the same test as a trailing rolling-``w`` min over
+    ``f`` (every sample in the window set), without the window buffer.
+    """
+    out = np.empty(flag.shape[0], dtype=np.int32)
+    run = 0
+    for i in range(flag.shape[0]):
+        run = run + 1 if flag[i] else 0
+        out[i] = run
+    return out
+
+
+@njit(cache=True)
+def ffill_limit(x, limit):
+    """
+    Forward-fill NaNs in place, at most ``limit`` samples past each valid value
+    (``Series.ffill(limit=limit)``). Leading NaNs are left as they are.
+    """
+    last = np.nan
+    gap = 0
+    for i in range(x.shape[0]):
+        if np.isnan(x[i]):
+            gap += 1
+            if gap <= limit:
+                x[i] = last
+        else:
+            last = x[i]
+            gap = 0
+
+
+@njit(cache=True)
+def spike_mask(x, baseline, spread, k):
+    """
+    ``x > baseline + k * spread`` in one pass, writing only the bool result.
+
+    Pass ``k`` in the arrays' dtype (e.g. ``np.float32(1.5)``) so the sum is
+    rounded exactly as the equivalent NumPy expression would be.
+    """
+    out = np.empty(x.shape[0], dtype=np.bool_)
+    for i in range(x.shape[0]):
+        out[i] = x[i] > baseline[i] + k * spread[i]
+    return out
+
+
+# Window length above which the heap median beats the sorted buffer (the
+# buffer's memmove grows with W; measured crossover is ~100 samples)
+_HEAP_MEDIAN_MIN_WINDOW = 128
+
+
+@njit(cache=True, error_model="numpy")
+def rolling_median(x, w, min_p):
+    """
+    Rolling median, exact to ``Series.rolling(w).median()``.
+
+    Short windows use a sorted buffer; long ones switch to a two-heap median
+    whose per-step cost is O(log W) instead of O(W).
+    """
+    if w >= _HEAP_MEDIAN_MIN_WINDOW:
+        return _rolling_median_heaps(x, w, min_p)
+    return _rolling_median_sorted(x, w, min_p)
+
+
+@njit(cache=True, error_model="numpy")
+def _rolling_median_sorted(x, w, min_p):
+    """
+    Sorted window buffer: each step binary-searches the insert and drop
+    positions and shifts the buffer, i.e. an O(W) memmove on a small array.
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan, dtype=x.dtype)
+    buf = np.empty(w, dtype=x.dtype)
+    cnt = 0
+    for i in range(n):
+        if i >= w:
+            old = x[i - w]
+            if not np.isnan(old):
+                j = np.searchsorted(buf[:cnt], old)
+                for k in range(j, cnt - 1):
+                    buf[k] = buf[k + 1]
+                cnt -= 1
+        v = x[i]
+        if not np.isnan(v):
+            j = np.searchsorted(buf[:cnt], v)
+            for k in range(cnt, j, -1):
+                buf[k] = buf[k - 1]
+            buf[j] = v
+            cnt += 1
+        if cnt >= min_p and cnt > 0:
+            half = cnt // 2
+            if cnt % 2:
+                out[i] = buf[half]
+            else:
+                out[i] = (np.float64(buf[half - 1]) + buf[half]) / 2.0
+    return out
+
+
+@njit(cache=True, error_model="numpy")
+def _rolling_median_heaps(x, w, min_p):
+    """
+    Two indexed heaps: a max-heap holds the lower half of the window and a
+    min-heap the upper half. Each sample is tracked by its ring-buffer slot,
+    so the one leaving the window is removed in place in O(log W).
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan, dtype=x.dtype)
+    # Lower half is stored negated so both halves share the min-heap helpers
+    lo_val = np.empty(w, dtype=x.dtype)
+    lo_slot = np.empty(w, dtype=np.int64)
+    hi_val = np.empty(w, dtype=x.dtype)
+    hi_slot = np.empty(w, dtype=np.int64)
+    pos = np.zeros(w, dtype=np.int64)     # heap index of each ring slot
+    side = np.zeros(w, dtype=np.int8)     # 0 = empty / NaN, 1 = lower, 2 = upper
+    n_lo = 0
+    n_hi = 0
+    for i in range(n):
+        s = i % w
+        if side[s] == 1:
+            n_lo = _heap_remove(lo_val, lo_slot, pos, n_lo, pos[s])
+        elif side[s] == 2:
+            n_hi = _heap_remove(hi_val, hi_slot, pos, n_hi, pos[s])
+        side[s] = 0
+
+        v = x[i]
+        if not np.isnan(v):
+            # Anything between the two tops may go either way; send it to the
+            # lower half, which keeps max(lower) <= min(upper)
+            if n_hi > 0 and v > hi_val[0]:
+                n_hi = _heap_push(hi_val, hi_slot, pos, n_hi, v, s)
+                side[s] = 2
+            else:
+                n_lo = _heap_push(lo_val, lo_slot, pos, n_lo, -v, s)
+                side[s] = 1
+        n_lo, n_hi = _rebalance(lo_val, lo_slot, hi_val, hi_slot, pos, side, n_lo, n_hi)
+
+        cnt = n_lo + n_hi
+        if cnt >= min_p and cnt > 0:
+            if cnt % 2:
+                out[i] = -lo_val[0]
+            else:
+                out[i] = (np.float64(hi_val[0]) - lo_val[0]) / 2.0
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Indexed min-heap helpers (val / slot arrays, pos maps slot → heap index)
+# ---------------------------------------------------------------------------
+
+@njit(cache=True, inline="always")
+def _sift_up(val, slot, pos, i, v, s):
+    """Place (v, s) at hole i, moving larger parents down. Returns final index."""
+    while i > 0:
+        parent = (i - 1) >> 1
+        if val[parent] <= v:
+            break
+        val[i] = val[parent]
+        slot[i] = slot[parent]
+        pos[slot[i]] = i
+        i = parent
+    val[i] = v
+    slot[i] = s
+    pos[s] = i
+    return i
+
+
+@njit(cache=True, inline="always")
+def _sift_down(val, slot, pos, i, n, v, s):
+    """Place (v, s) at hole i, moving smaller children up."""
+    while True:
+        child = 2 * i + 1
+        if child >= n:
+            break
+        if child + 1 < n and val[child + 1] < val[child]:
+            child += 1
+        if v <= val[child]:
+            break
+        val[i] = val[child]
+        slot[i] = slot[child]
+        pos[slot[i]] = i
+        i = child
+    val[i] = v
+    slot[i] = s
+    pos[s] = i
+
+
+@njit(cache=True, inline="always")
+def _heap_push(val, slot, pos, n, v, s):
+    _sift_up(val, slot, pos, n, v, s)
+    return n + 1
+
+
+@njit(cache=True, inline="always")
+def _heap_remove(val, slot, pos, n, i):
+    """Drop the entry at heap index i by refilling the hole with the last entry."""
+    last = n - 1
+    if i != last:
+        v = val[last]
+        s = slot[last]
+        if i > 0 and v < val[(i - 1) >> 1]:
+            _sift_up(val, slot, pos, i, v, s)
+        else:
+            _sift_down(val, slot, pos, i, last, v, s)
+    return last
+
+
+@njit(cache=True, inline="always")
+def _rebalance(lo_val, lo_slot, hi_val, hi_slot, pos, side, n_lo, n_hi):
+    """Restore n_lo == n_hi or n_lo == n_hi + 1 by moving heap tops across."""
+    while n_lo > n_hi + 1:
+        s = lo_slot[0]
+        v = -lo_val[0]
+        n_lo = _heap_remove(lo_val, lo_slot, pos, n_lo, 0)
+        n_hi = _heap_push(hi_val, hi_slot, pos, n_hi, v, s)
+        side[s] = 2
+    while n_hi > n_lo:
+        s = hi_slot[0]
+        v = hi_val[0]
+        n_hi = _heap_remove(hi_val, hi_slot, pos, n_hi, 0)
+        n_lo = _heap_push(lo_val, lo_slot, pos, n_lo, -v, s)
+        side[s] = 1
+    return n_lo, n_hi
@@ -0,0 +1,136 @@
+"""
+batch.py — Parallel stick-slip detection for multi-well and long-log runs.
+
+compute_signals → detect_events only ever looks at its own frame, so
+independent wells are scheduled as dask.delayed tasks. A single long log is
+split into row chunks that each carry a left halo covering every trailing
+lookback (torque baseline, MWD forward-fill, sustained-event run); event_id
+is renumbered over the whole log afterwards so events crossing a chunk edge
+stay whole.
+
+Chunked output is NOT bit-identical to one serial pass. The Welford state in
+rolling_mean_std carries rounding from wherever its pass started, so every
+column derived from the rolling RPM mean/std or torque std can differ by a
+few float32 ulps: rpm_roll_mean (~1e-5 RPM), rpm_roll_std, rpm_ssi,
+torque_roll_std, mwd_ssi and css (~1e-8 to 1e-7). A value sitting on a
+threshold can therefore flip torque_spike, severity_label, the not-rotating
+mask or stick_slip_flag, which moves an event edge by a sample or splits or
+merges events. Use one serial pass where exact reproducibility matters.
+
+dask is only required by this module (``pip install dask``).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+
+import dask
+import pandas as pd
+
+from .detection import (
+    SEVERITY_MILD,
+    _cache_interval,
+    _label_segments,
+    _sample_interval,
+    compute_signals,
+    detect_events,
+    lookback_samples,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _detect(
+    df: pd.DataFrame,
+    window_s: int,
+    css_threshold: float,
+    min_duration_s: float,
+    dt: float | None,
+) -> pd.DataFrame:
+    df = compute_signals(df, window_s=window_s, dt=dt)
+    return detect_events(df, css_threshold=css_threshold, min_duration_s=min_duration_s)
+
+
+def detect_many(
+    frames: Iterable[pd.DataFrame],
+    window_s: int = 60,
+    css_threshold: float = SEVERITY_MILD,
+    min_duration_s: float = 20.0,
+    scheduler: str = "processes",
+) -> list[pd.DataFrame]:
+    """
+    Run compute_signals + detect_events on independent frames in parallel.
+
+    Parameters
+    ----------
+    frames : iterable of pd.DataFrame
+        One on-bottom frame per well or file, as returned by data_loader.
+    scheduler : str
+        Any dask scheduler name; the Numba kernels hold the GIL, so
+        ``"processes"`` (default) is the one that scales across cores.
+
+    Returns
+    -------
+    list of pd.DataFrame
+        Detection output for each frame, in input order.
+    """
+    tasks = [
+        dask.delayed(_detect)(df, window_s, css_threshold, min_duration_s, None)
+        for df in frames
+    ]
+    return list(dask.compute(*tasks, scheduler=scheduler))
+
+
+def detect_chunked(
+    df: pd.DataFrame,
+    chunk_rows: int = 50_000,
+    window_s: int = 60,
+    css_threshold: float = SEVERITY_MILD,
+    min_duration_s: float = 20.0,
+    scheduler: str = "processes",
+) -> pd.DataFrame:
+    """
+    Run detection on one long log as parallel row chunks.
+
+    Each chunk is extended backwards by a halo long enough for every trailing
+    window to be fully populated at the chunk's first row; the halo rows are
+    dropped after processing. Only worthwhile for logs well beyond a single
+    hole section — process start-up and pickling dominate below ~10⁶ rows.
+
+    Returns
+    -------
+    pd.DataFrame
+        Same columns as ``detect_events(compute_signals(df))``. The rolling-
+        mean/std columns and everything derived from them may differ by float32
+        rounding, and threshold flags and event edges can shift (see module
+        docstring).
+    """
+    # One interval for every chunk: a chunk-local median could pick other windows
+    dt = _sample_interval(df)
+    if len(df) <= chunk_rows:
+        return _detect(df, window_s, css_threshold, min_duration_s, dt)
+
+    halo = lookback_samples(window_s, min_duration_s, dt)
+
+    starts = range(0, len(df), chunk_rows)
+    tasks = [
+        dask.delayed(_detect)(
+            df.iloc[max(start - halo, 0):start + chunk_rows],
+            window_s, css_threshold, min_duration_s, dt,
+        )
+        for start in starts
+    ]
+    parts = dask.compute(*tasks, scheduler=scheduler)
+
+    out = pd.concat(
+        [part.iloc[start - max(start - halo, 0):] for start, part in zip(starts, parts)]
+    )
+    out["event_id"] = _label_segments(out["stick_slip_flag"].to_numpy())
+    out.attrs = dict(df.attrs)
+    _cache_interval(out, dt)
+    logger.info(
+        "Chunked detection | %d chunks of %d rows (halo %d) | events=%d",
+        len(parts), chunk_rows, halo, int(out["event_id"].max()),
+    )
+    return out
@@ -9,11 +9,13 @@ raised to push through the torsional resonance. See README for control equations
 from __future__ import annotations
 
 import logging
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from enum import Enum, auto
 
 import numpy as np
 import pandas as pd
+from numba import njit
 
 logger = logging.getLogger(__name__)
 
@@ -68,22 +70,57 @@ class ControlAction:
     action_taken: str = ""
 
 
+_TRACE_COLUMNS = ["time_s", "state", "wob_setpoint", "rpm_setpoint",
+                  "ssi_observed", "action_taken"]
+
+
 @dataclass
 class ControllerTrace:
-    actions: list[ControlAction] = field(default_factory=list)
+    """Controller output stored column-wise: one row per telemetry sample."""
+
+    frame: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=_TRACE_COLUMNS))
+
+    @classmethod
+    def from_actions(cls, actions: Iterable[ControlAction]) -> ControllerTrace:
+        """Build a trace from per-sample ControlAction records."""
+        return cls(frame=pd.DataFrame(
+            [
+                {
+                    "time_s": a.time_s,
+                    "state": a.state.name,
+                    "wob_setpoint": round(a.wob_setpoint, 4),
+                    "rpm_setpoint": round(a.rpm_setpoint, 2),
+                    "ssi_observed": round(a.ssi_observed, 4),
+                    "action_taken": a.action_taken,
+                }
+                for a in actions
+            ],
+            columns=_TRACE_COLUMNS,
+        ))
+
+    @property
+    def actions(self) -> tuple[ControlAction, ...]:
+        """
+        Read-only per-sample ControlAction view, materialised on demand from
+        ``frame``; use ``from_actions`` to build a trace from records.
+        """
+        f = self.frame
+        return tuple(
+            ControlAction(
+                time_s=t, state=ControllerState[st],
+                wob_setpoint=wob, rpm_setpoint=rpm,
+                ssi_observed=ssi, action_taken=act,
+            )
+            for t, st, wob, rpm, ssi, act in zip(
+                f["time_s"].tolist(), f["state"].tolist(),
+                f["wob_setpoint"].tolist(), f["rpm_setpoint"].tolist(),
+                f["ssi_observed"].tolist(), f["action_taken"].tolist(),
+            )
+        )
 
     def to_dataframe(self) -> pd.DataFrame:
-        return pd.DataFrame([
-            {
-                "time_s": a.time_s,
-                "state": a.state.name,
-                "wob_setpoint": round(a.wob_setpoint, 4),
-                "rpm_setpoint": round(a.rpm_setpoint, 2),
-                "ssi_observed": round(a.ssi_observed, 4),
-                "action_taken": a.action_taken,
-            }
-            for a in self.actions
-        ])
+        # Copy-on-write makes the shallow copy free and keeps edits off the trace
+        return self.frame.copy(deep=False)
 
 
 # ---------------------------------------------------------------------------
@@ -128,16 +165,17 @@ class AutoDriller:
         -------
         ControllerTrace
         """
-        trace = ControllerTrace()
+        time_s = df["time_s"].to_numpy(dtype=np.float64)
+        css = df["css"].to_numpy(dtype=np.float64)
 
-        # Establish nominal setpoints: median of earliest stable 5 minutes
-        t_window_end = df["time_s"].iloc[0] + 300.0
-        early = df[df["time_s"] <= t_window_end]
-        stable_early = early[early["css"].fillna(1.0) < self.cfg.ssi_engage]
+        # Establish nominal setpoints: median of earliest stable 5 minutes.
+        # time_s is sorted, so the window is a prefix found by binary search.
+        cut = int(np.searchsorted(time_s, time_s[0] + 300.0, side="right"))
+        stable = np.nan_to_num(css[:cut], nan=1.0) < self.cfg.ssi_engage
 
-        if len(stable_early) >= 10:
-            self._nominal_wob = float(stable_early["wob_kkgf"].median())
-            self._nominal_rpm = float(stable_early["rpm"].median())
+        if np.count_nonzero(stable) >= 10:
+            self._nominal_wob = float(np.nanmedian(df["wob_kkgf"].to_numpy()[:cut][stable]))
+            self._nominal_rpm = float(np.nanmedian(df["rpm"].to_numpy()[:cut][stable]))
         else:
             # Fallback: global drilling median
             self._nominal_wob = float(df["wob_kkgf"].median())
@@ -147,110 +185,172 @@ class AutoDriller:
         self._nominal_wob = max(self._nominal_wob, 2.0)
         self._nominal_rpm = max(self._nominal_rpm, 30.0)
 
-        wob_sp = self._nominal_wob
-        rpm_sp = self._nominal_rpm
-
         logger.info(
             "AutoDriller nominal | WOB=%.2f kkgf | RPM=%.1f",
             self._nominal_wob,
             self._nominal_rpm,
         )
 
-        for _, row in df.iterrows():
-            ssi = row.get("css", np.nan)
-            t = float(row["time_s"])
-
-            if np.isnan(ssi):
-                trace.actions.append(ControlAction(
-                    time_s=t, state=self._state,
-                    wob_setpoint=wob_sp, rpm_setpoint=rpm_sp,
-                    ssi_observed=0.0, action_taken="no_data",
-                ))
-                continue
-
-            action = "hold"
-
-            if self._state == ControllerState.NORMAL:
-                wob_sp = self._nominal_wob
-                rpm_sp = self._nominal_rpm
-                if ssi >= self.cfg.ssi_engage:
-                    self._state = ControllerState.DETECTING
-                    self._detection_start_t = t
-                    action = "event_detected"
-
-            elif self._state == ControllerState.DETECTING:
-                if ssi < self.cfg.ssi_engage:
-                    self._state = ControllerState.NORMAL
-                    action = "transient_cleared"
-                elif (t - self._detection_start_t) >= self.cfg.detection_holdoff_s:
-                    self._state = ControllerState.MITIGATING
-                    action = "mitigation_engaged"
-
-            elif self._state == ControllerState.MITIGATING:
-                excess = max(0.0, ssi - self.cfg.ssi_engage)
-
-                # WOB: reduce proportionally to SSI excess
-                wob_reduction = self.cfg.kp_wob * excess * self._nominal_wob
-                wob_sp = max(
-                    self._nominal_wob * self.cfg.wob_min_fraction,
-                    self._nominal_wob - wob_reduction,
-                )
-
-                # RPM: increase proportionally to push through resonance
-                rpm_increase = self.cfg.kp_rpm * excess * 10.0
-                rpm_sp = min(
-                    self._nominal_rpm + self.cfg.rpm_max_increase,
-                    self._nominal_rpm + rpm_increase,
-                )
-
-                action = (
-                    f"WOB↓{wob_sp:.1f} RPM↑{rpm_sp:.0f}"
-                )
-
-                if ssi < self.cfg.ssi_recovery:
-                    self._state = ControllerState.RECOVERING
-                    self._recovery_start_t = t
-                    action = "recovery_phase"
-
-            elif self._state == ControllerState.RECOVERING:
-                hold_elapsed = t - self._recovery_start_t
-
-                if ssi >= self.cfg.ssi_engage:
-                    # Relapse: jump back to mitigating immediately
-                    self._state = ControllerState.MITIGATING
-                    action = "relapse"
-                elif hold_elapsed >= self.cfg.recovery_hold_s:
-                    # Stable for hold period: ramp WOB back toward nominal
-                    wob_sp = min(
-                        self._nominal_wob,
-                        wob_sp + self.cfg.wob_ramp_rate * self._nominal_wob,
-                    )
-                    rpm_sp = max(
-                        self._nominal_rpm,
-                        rpm_sp - self.cfg.wob_ramp_rate * self.cfg.rpm_max_increase,
-                    )
-                    action = f"ramp_wob→{wob_sp:.1f}"
-
-                    if wob_sp >= self._nominal_wob * 0.98:
-                        rpm_sp = self._nominal_rpm
-                        self._state = ControllerState.NORMAL
-                        action = "fully_recovered"
-
-            trace.actions.append(ControlAction(
-                time_s=t, state=self._state,
-                wob_setpoint=wob_sp, rpm_setpoint=rpm_sp,
-                ssi_observed=ssi, action_taken=action,
-            ))
+        (
+            state_arr, wob_arr, rpm_arr, ssi_arr, action_arr,
+            final_state, self._detection_start_t, self._recovery_start_t,
+        ) = _run_nb(
+            time_s, css,
+            self._state.value - 1, self._detection_start_t, self._recovery_start_t,
+            self.cfg.ssi_engage, self.cfg.ssi_recovery, self.cfg.detection_holdoff_s,
+            self.cfg.kp_wob, self.cfg.wob_min_fraction, self.cfg.wob_ramp_rate,
+            self.cfg.kp_rpm, self.cfg.rpm_max_increase, self.cfg.recovery_hold_s,
+            self._nominal_wob, self._nominal_rpm,
+        )
+        self._state = ControllerState(final_state + 1)
+
+        # Labels with embedded setpoints are only formatted for the rows that need them
+        actions = _ACTION_NAMES[action_arr]
+        for i in np.flatnonzero(action_arr == _ACT_MITIGATE):
+            actions[i] = f"WOB↓{wob_arr[i]:.1f} RPM↑{rpm_arr[i]:.0f}"
+        for i in np.flatnonzero(action_arr == _ACT_RAMP):
+            actions[i] = f"ramp_wob→{wob_arr[i]:.1f}"
+
+        trace = ControllerTrace(frame=pd.DataFrame({
+            "time_s": time_s,
+            "state": _STATE_NAMES[state_arr],
+            "wob_setpoint": np.round(wob_arr, 4),
+            "rpm_setpoint": np.round(rpm_arr, 2),
+            "ssi_observed": np.round(ssi_arr, 4),
+            "action_taken": actions,
+        }))
 
         # Report state distribution
-        state_counts = {}
-        for a in trace.actions:
-            state_counts[a.state.name] = state_counts.get(a.state.name, 0) + 1
+        counts = np.bincount(state_arr, minlength=len(_STATE_NAMES))
+        state_counts = {
+            name: int(cnt) for name, cnt in zip(_STATE_NAMES, counts) if cnt
+        }
         logger.info("Controller state distribution: %s", state_counts)
 
         return trace
 
 
+# ---------------------------------------------------------------------------
+# Compiled state machine kernel
+# ---------------------------------------------------------------------------
+
+# ControllerState encoded as ``value - 1`` inside the kernel
+_NORMAL, _DETECTING, _MITIGATING, _RECOVERING = 0, 1, 2, 3
+_STATE_NAMES = np.array([s.name for s in ControllerState], dtype=object)
+
+# action_taken codes; _ACT_MITIGATE and _ACT_RAMP are formatted with setpoints
+(
+    _ACT_HOLD, _ACT_NO_DATA, _ACT_EVENT_DETECTED, _ACT_TRANSIENT_CLEARED,
+    _ACT_MITIGATION_ENGAGED, _ACT_MITIGATE, _ACT_RECOVERY_PHASE, _ACT_RELAPSE,
+    _ACT_RAMP, _ACT_FULLY_RECOVERED,
+) = range(10)
+_ACTION_NAMES = np.array([
+    "hold", "no_data", "event_detected", "transient_cleared",
+    "mitigation_engaged", "mitigate", "recovery_phase", "relapse",
+    "ramp_wob", "fully_recovered",
+], dtype=object)
+
+
+@njit(cache=True, error_model="numpy")
+def _run_nb(
+    time, css, state, detection_start_t, recovery_start_t,
+    ssi_engage, ssi_recovery, holdoff, kp_wob, wob_min_frac, wob_ramp_rate,
+    kp_rpm, rpm_max_inc, rec_hold, nom_wob, nom_rpm,
+):
+    """
+    Run the controller state machine over a whole telemetry trace.
+
+    Returns per-sample (state, wob_sp, rpm_sp, ssi_observed, action) arrays
+    plus the final state and timer values so the controller can resume.
+    """
+    n = time.shape[0]
+    state_out = np.empty(n, dtype=np.int8)
+    action_out = np.empty(n, dtype=np.int8)
+    wob_out = np.empty(n, dtype=np.float64)
+    rpm_out = np.empty(n, dtype=np.float64)
+    ssi_out = np.empty(n, dtype=np.float64)
+
+    wob_sp = nom_wob
+    rpm_sp = nom_rpm
+
+    for i in range(n):
+        ssi = css[i]
+        t = time[i]
+
+        if np.isnan(ssi):
+            state_out[i] = state
+            wob_out[i] = wob_sp
+            rpm_out[i] = rpm_sp
+            ssi_out[i] = 0.0
+            action_out[i] = _ACT_NO_DATA
+            continue
+
+        action = _ACT_HOLD
+
+        if state == _NORMAL:
+            wob_sp = nom_wob
+            rpm_sp = nom_rpm
+            if ssi >= ssi_engage:
+                state = _DETECTING
+                detection_start_t = t
+                action = _ACT_EVENT_DETECTED
+
+        elif state == _DETECTING:
+            if ssi < ssi_engage:
+                state = _NORMAL
+                action = _ACT_TRANSIENT_CLEARED
+            elif (t - detection_start_t) >= holdoff:
+                state = _MITIGATING
+                action = _ACT_MITIGATION_ENGAGED
+
+        elif state == _MITIGATING:
+            excess = max(0.0, ssi - ssi_engage)
+
+            # WOB: reduce proportionally to SSI excess
+            wob_reduction = kp_wob * excess * nom_wob
+            wob_sp = max(nom_wob * wob_min_frac, nom_wob - wob_reduction)
+
+            # RPM: increase proportionally to push through resonance
+            rpm_increase = kp_rpm * excess * 10.0
+            rpm_sp = min(nom_rpm + rpm_max_inc, nom_rpm + rpm_increase)
+
+            action = _ACT_MITIGATE
+
+            if ssi < ssi_recovery:
+                state = _RECOVERING
+                recovery_start_t = t
+                action = _ACT_RECOVERY_PHASE
+
+        elif state == _RECOVERING:
+            hold_elapsed = t - recovery_start_t
+
+            if ssi >= ssi_engage:
+                # Relapse: jump back to mitigating immediately
+                state = _MITIGATING
+                action = _ACT_RELAPSE
+            elif hold_elapsed >= rec_hold:
+                # Stable for hold period: ramp WOB back toward nominal
+                wob_sp = min(nom_wob, wob_sp + wob_ramp_rate * nom_wob)
+                rpm_sp = max(nom_rpm, rpm_sp - wob_ramp_rate * rpm_max_inc)
+                action = _ACT_RAMP
+
+                if wob_sp >= nom_wob * 0.98:
+                    rpm_sp = nom_rpm
+                    state = _NORMAL
+                    action = _ACT_FULLY_RECOVERED
+
+        state_out[i] = state
+        wob_out[i] = wob_sp
+        rpm_out[i] = rpm_sp
+        ssi_out[i] = ssi
+        action_out[i] = action
+
+    return (
+        state_out, wob_out, rpm_out, ssi_out, action_out,
+        state, detection_start_t, recovery_start_t,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Physics model: torsional drill-string response simulation
 # ---------------------------------------------------------------------------
@@ -278,47 +378,19 @@ def simulate_drillstring_response(
         how="left",
     )
 
-    dt_series = merged["time_s"].diff().fillna(4.0).clip(lower=0.5, upper=30.0)
-    n = len(merged)
-
-    sim_rpm = np.zeros(n)
-    sim_torque = np.zeros(n)
-    sim_rop = np.zeros(n)
-
-    k = cfg.drill_string_stiffness
-    c = cfg.bit_damping
-    I = cfg.inertia_drillstring
-
-    # Initialise at the first setpoint
-    omega = float(merged["rpm_setpoint"].iloc[0]) * (2 * np.pi / 60.0)
-    theta_twist = 0.0
-
-    for i in range(n):
-        dt = float(dt_series.iloc[i])
-        wob = float(merged["wob_setpoint"].iloc[i])
-        omega_set = float(merged["rpm_setpoint"].iloc[i]) * (2 * np.pi / 60.0)
-
-        # Bit-rock Coulomb friction torque (Pessier & Fear 1992 simplified model)
-        # τ_bit = μ × WOB × r_bit  where r_bit ≈ 0.155 m for 12.25-in bit
-        tau_bit = 0.55 * wob * 9.81 * 0.155
-
-        # Drive system: PD torque controller tracking RPM setpoint
-        T_drive = k * 0.4 * (omega_set - omega) + c * 0.08 * omega_set
-
-        # Equation of motion (forward Euler)
-        torque_net = T_drive - k * theta_twist - c * omega - tau_bit
-        alpha = np.clip(torque_net / I, -50.0, 50.0)   # limit angular acceleration
-        omega += alpha * dt
-        omega = max(0.0, omega)
-        theta_twist = np.clip(theta_twist + (omega_set - omega) * dt, -5.0, 5.0)
-
-        sim_rpm[i] = omega * 60.0 / (2 * np.pi)
-        sim_torque[i] = max(0.0, abs(T_drive - tau_bit))
+    dt = (
+        merged["time_s"].diff().fillna(4.0).clip(lower=0.5, upper=30.0)
+        .to_numpy(dtype=np.float32)
+    )
+    wob = merged["wob_setpoint"].to_numpy(dtype=np.float32)
+    omega_set = (
+        merged["rpm_setpoint"].to_numpy(dtype=np.float32) * np.float32(2 * np.pi / 60.0)
+    )
 
-        # Bingham-style ROP model: ROP ∝ (WOB - WOB_threshold)^0.6 × N^0.4
-        wob_eff = max(0.0, wob - 1.2)
-        n_rpm = max(0.0, sim_rpm[i])
-        sim_rop[i] = 2.8 * (wob_eff ** 0.6) * ((n_rpm / 80.0) ** 0.4)
+    sim_rpm, sim_torque, sim_rop = _integrate(
+        dt, wob, omega_set,
+        cfg.drill_string_stiffness, cfg.bit_damping, cfg.inertia_drillstring,
+    )
 
     merged["sim_rpm"] = np.clip(sim_rpm, 0, 300)
     merged["sim_torque"] = np.clip(sim_torque, 0, 60)
@@ -331,3 +403,59 @@ def simulate_drillstring_response(
         merged["sim_rop"].min(), merged["sim_rop"].max(),
     )
     return merged
+
+
+@njit(cache=True, fastmath=True, error_model="numpy")
+def _integrate(dt, wob, omega_set, k, c, I):
+    """
+    Forward-Euler torsional integrator; returns (sim_rpm, sim_torque, sim_rop).
+
+    Runs entirely in float32: inputs are float32 arrays and every constant is
+    hoisted out of the loop and narrowed, so no step promotes to float64.
+    """
+    n = dt.shape[0]
+    sim_rpm = np.zeros(n, dtype=np.float32)
+    sim_torque = np.zeros(n, dtype=np.float32)
+    sim_rop = np.zeros(n, dtype=np.float32)
+
+    # Bit-rock Coulomb friction torque (Pessier & Fear 1992 simplified model)
+    # τ_bit = μ × WOB × r_bit  where r_bit ≈ 0.155 m for 12.25-in bit
+    TAU_K = np.float32(0.55 * 9.81 * 0.155)
+    # Drive system: PD torque controller tracking RPM setpoint
+    K_P = np.float32(k * 0.4)
+    C_D = np.float32(c * 0.08)
+    K = np.float32(k)
+    C = np.float32(c)
+    INV_I = np.float32(1.0 / I)
+    RPM_PER_RAD_S = np.float32(60.0 / (2.0 * np.pi))
+    ALPHA_MAX = np.float32(50.0)
+    TWIST_MAX = np.float32(5.0)
+    ZERO = np.float32(0.0)
+    WOB_THRESHOLD = np.float32(1.2)
+    ROP_K = np.float32(2.8)
+    INV_N_REF = np.float32(1.0 / 80.0)
+    WOB_EXP = np.float32(0.6)
+    N_EXP = np.float32(0.4)
+
+    # Initialise at the first setpoint
+    omega = omega_set[0] if n else ZERO
+    theta_twist = ZERO
+
+    for i in range(n):
+        tau_bit = TAU_K * wob[i]
+        T_drive = K_P * (omega_set[i] - omega) + C_D * omega_set[i]
+
+        # Equation of motion (forward Euler)
+        torque_net = T_drive - K * theta_twist - C * omega - tau_bit
+        alpha = min(ALPHA_MAX, max(-ALPHA_MAX, torque_net * INV_I))   # limit angular acceleration
+        omega = max(ZERO, omega + alpha * dt[i])
+        theta_twist = min(TWIST_MAX, max(-TWIST_MAX, theta_twist + (omega_set[i] - omega) * dt[i]))
+
+        sim_rpm[i] = omega * RPM_PER_RAD_S
+        sim_torque[i] = abs(T_drive - tau_bit)
+
+        # Bingham-style ROP model: ROP ∝ (WOB - WOB_threshold)^0.6 × N^0.4
+        wob_eff = max(ZERO, wob[i] - WOB_THRESHOLD)
+        sim_rop[i] = ROP_K * (wob_eff ** WOB_EXP) * ((sim_rpm[i] * INV_N_REF) ** N_EXP)
+
+    return sim_rpm, sim_torque, sim_rop
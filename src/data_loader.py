@@ -13,11 +13,15 @@ Key filtering criteria for active drilling rows:
 
 from __future__ import annotations
 
+import csv
 import logging
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+from numba import njit
 
 logger = logging.getLogger(__name__)
 
@@ -37,9 +41,28 @@ COLUMN_MAP: dict[str, str] = {
     "DateTime parsed": "datetime",
 }
 
-# Rows 50 000–300 000 (chunks 1–5) contain the 12.25-in drilling section
-_CHUNKS_TO_LOAD = [1, 2, 3, 4, 5]
-_CHUNK_SIZE = 50_000
+# Parse type for every mapped column. The streaming reader would otherwise infer
+# types from its first block and fail later on valid rows (e.g. an SPP channel
+# that is empty early on, or a clock that only turns fractional later).
+# Sensor channels go straight to float32 (source ADCs are well below 24-bit);
+# timestamps stay strings so pd.to_datetime can coerce malformed values.
+CSV_DTYPES: dict[str, pa.DataType] = {
+    "Time s": pa.float64(),
+    "Averaged RPM rpm": pa.float32(),
+    "Average Surface Torque kN.m": pa.float32(),
+    "Averaged WOB kkgf": pa.float32(),
+    "Rate of Penetration m/h": pa.float32(),
+    "Bit Depth m": pa.float32(),
+    "MWD Stick-Slip PKtoPK RPM rpm": pa.float32(),
+    "Stand Pipe Pressure kPa": pa.float64(),
+    "Average Standpipe Pressure kPa": pa.float64(),
+    "DateTime parsed": pa.string(),
+}
+
+# Rows 50 000–300 000 contain the 12.25-in drilling section
+_SKIP_ROWS = 50_000
+_N_ROWS = 250_000
+_BLOCK_SIZE = 8 << 20   # bytes per pyarrow parse block
 
 # Active drilling gate criteria
 _MIN_WOB_KKGF = 0.5
@@ -65,16 +88,36 @@ def load_time_log(filepath: str | Path) -> pd.DataFrame:
     filepath = Path(filepath)
     logger.info("Loading time log: %s", filepath.name)
 
-    parts: list[pd.DataFrame] = []
-    for i, chunk in enumerate(
-        pd.read_csv(filepath, chunksize=_CHUNK_SIZE, low_memory=False)
-    ):
-        if i in _CHUNKS_TO_LOAD:
-            parts.append(chunk)
-        elif i > max(_CHUNKS_TO_LOAD):
+    # Only parse the mapped columns that this export actually contains
+    with open(filepath, newline="") as f:
+        header = next(csv.reader(f))
+    usecols = [c for c in COLUMN_MAP if c in header]
+
+    # Stream blocks and stop once the drilling window is filled, so rows past
+    # the window are never parsed. Every column type is pinned (CSV_DTYPES).
+    reader = pv.open_csv(
+        filepath,
+        read_options=pv.ReadOptions(
+            skip_rows_after_names=_SKIP_ROWS, block_size=_BLOCK_SIZE,
+        ),
+        convert_options=pv.ConvertOptions(
+            include_columns=usecols,
+            column_types={c: CSV_DTYPES[c] for c in usecols},
+        ),
+    )
+    batches: list[pa.RecordBatch] = []
+    n_rows = 0
+    for batch in reader:
+        batches.append(batch)
+        n_rows += batch.num_rows
+        if n_rows >= _N_ROWS:
             break
+    reader.close()
 
-    raw = pd.concat(parts, ignore_index=True)
+    table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, _N_ROWS)
+    del batches
+    raw = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
     logger.info("Raw rows loaded: %d", len(raw))
 
     rename = {k: v for k, v in COLUMN_MAP.items() if k in raw.columns}
@@ -83,7 +126,9 @@ def load_time_log(filepath: str | Path) -> pd.DataFrame:
     # --- Timestamps ----------------------------------------------------------
     if "datetime" in df.columns:
         df["datetime"] = pd.to_datetime(df["datetime"], utc=True, errors="coerce")
-        df = df.sort_values("datetime").reset_index(drop=True)
+        # Stable argsort keeps file order among equal timestamps (NaT sorts last)
+        order = np.argsort(df["datetime"].values, kind="stable")
+        df = df.take(order).reset_index(drop=True)
         t0 = df["datetime"].dropna().iloc[0]
         df["time_s"] = (df["datetime"] - t0).dt.total_seconds()
     else:
@@ -93,27 +138,35 @@ def load_time_log(filepath: str | Path) -> pd.DataFrame:
 
     # --- Active drilling filter ----------------------------------------------
     # WOB and RPM must both be in the active-drilling range.
-    # Negative or near-zero WOB indicates the bit is off bottom.
-    df["wob_kkgf"] = df["wob_kkgf"].clip(lower=0.0)
-    on_bottom = (df["wob_kkgf"] > _MIN_WOB_KKGF) & (df["rpm"] > _MIN_RPM)
-    df = df[on_bottom].copy()
+    # Negative or near-zero WOB indicates the bit is off bottom; the gate already
+    # implies WOB > 0, so no separate clip is needed.
+    on_bottom = (
+        (df["wob_kkgf"].to_numpy() > _MIN_WOB_KKGF) & (df["rpm"].to_numpy() > _MIN_RPM)
+    )
+    df = df.iloc[on_bottom].copy()
     logger.info("On-bottom drilling rows (WOB>%.1f, RPM>%.1f): %d",
                 _MIN_WOB_KKGF, _MIN_RPM, len(df))
 
     # --- Signal conditioning -------------------------------------------------
+    # Done on the float32 arrays from the reader; each column is written back once.
     # Torque: clip sensor glitches (e.g., -888 kNm spike is an instrument fault)
-    df["torque_kNm"] = df["torque_kNm"].clip(lower=-_MAX_TORQUE_ABS, upper=_MAX_TORQUE_ABS)
+    torque = df["torque_kNm"].to_numpy(dtype=np.float32, copy=True)
+    np.clip(torque, -_MAX_TORQUE_ABS, _MAX_TORQUE_ABS, out=torque)
+    df["torque_kNm"] = torque
 
     # ROP: cap extreme spikes at 99th percentile × 1.5 and interpolate gaps
-    rop_99 = df["rop_mh"].quantile(0.99)
-    df.loc[df["rop_mh"] > rop_99 * 1.5, "rop_mh"] = np.nan
-    df["rop_mh"] = df["rop_mh"].interpolate(method="linear", limit=10)
+    rop = df["rop_mh"].to_numpy(dtype=np.float32, copy=True)
+    rop[rop > np.nanquantile(rop, 0.99) * 1.5] = np.nan
+    df["rop_mh"] = _interpolate_limit(rop, 10)
 
     # WOB: forward-fill short sensor dropouts (common in real WITSML streams)
     df["wob_kkgf"] = df["wob_kkgf"].ffill().bfill()
 
     # --- Deduplicate and sort ------------------------------------------------
-    df = df.drop_duplicates(subset="time_s").sort_values("time_s").reset_index(drop=True)
+    # np.unique sorts and returns each value's first occurrence: equivalent to
+    # drop_duplicates(keep="first") + sort_values in a single pass over time_s
+    _, first = np.unique(df["time_s"].to_numpy(), return_index=True)
+    df = df.take(first).reset_index(drop=True)
 
     logger.info(
         "Date range : %s → %s",
@@ -130,3 +183,31 @@ def load_time_log(filepath: str | Path) -> pd.DataFrame:
     )
 
     return df
+
+
+# ---------------------------------------------------------------------------
+# Kernels
+# ---------------------------------------------------------------------------
+
+@njit(cache=True, error_model="numpy")
+def _interpolate_limit(x, limit):
+    """
+    Linear gap interpolation matching ``Series.interpolate(method="linear",
+    limit=limit)``: at most ``limit`` NaNs are filled after each valid sample,
+    leading NaNs are kept and trailing NaNs take the last valid value.
+    """
+    out = x.copy()
+    n = x.shape[0]
+    prev = -1
+    for i in range(n):
+        if np.isnan(x[i]):
+            continue
+        if prev >= 0 and i - prev > 1:
+            step = (np.float64(x[i]) - x[prev]) / (i - prev)
+            for j in range(prev + 1, min(i, prev + limit + 1)):
+                out[j] = x[prev] + step * (j - prev)
+        prev = i
+    if prev >= 0:
+        for j in range(prev + 1, min(n, prev + limit + 1)):
+            out[j] = x[prev]
+    return out
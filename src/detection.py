@@ -9,9 +9,19 @@ into a unified 0–1 index used by the controller.
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
 
 import numpy as np
 import pandas as pd
+from scipy.fft import rfft, rfftfreq
+
+from ._kernels import (
+    ffill_limit,
+    rolling_mean_std,
+    rolling_median,
+    run_length,
+    spike_mask,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,17 +32,139 @@ SEVERITY_STABLE = 0.25
 SEVERITY_MILD = 0.50
 SEVERITY_MODERATE = 0.75
 
+# Bucket edges and labels for severity_label: CSS in [edge_i, edge_i+1) → label_i+1
+_SEVERITY_EDGES = np.array([SEVERITY_STABLE, SEVERITY_MILD, SEVERITY_MODERATE])
+_SEVERITY_LABELS = np.array(["STABLE", "MILD", "MODERATE", "SEVERE"])
+
 # MWD scale: 381 rpm PKtoPK is the observed maximum in this dataset
 _MWD_MAX_PKTOPK = 400.0
 
 # Torque deviation: flag if torque > baseline + N × rolling std
 _TORQUE_SPIKE_SIGMA = 1.5
 
+# MWD surveys arrive at intervals; a reading is carried forward this many samples
+_MWD_FFILL_LIMIT = 8
+
+
+def _sample_interval(df: pd.DataFrame, dt: float | None = None) -> float:
+    """
+    Median sample interval of ``df["time_s"]`` in seconds.
+
+    An explicit ``dt`` wins; otherwise the value cached in ``df.attrs["dt_s"]``
+    by an earlier pipeline stage is reused, and only then is it measured. pandas
+    carries attrs through ``iloc``, filters and concat, so the cache is only
+    trusted while the frame still has the time axis it was measured on.
+    """
+    key = df.attrs.get("dt_key")
+    if dt is None and key is not None and np.array_equal(key, _time_key(df), equal_nan=True):
+        dt = df.attrs.get("dt_s")
+    if dt is None:
+        dt = _median_interval(df["time_s"].to_numpy(dtype=np.float64))
+    return float(dt)
+
+
+def _cache_interval(df: pd.DataFrame, dt: float) -> None:
+    """Record ``dt`` in ``df.attrs`` together with the time axis it belongs to."""
+    df.attrs["dt_s"] = dt
+    df.attrs["dt_key"] = _time_key(df)
+
+
+def _time_key(df: pd.DataFrame) -> tuple[int, float, float]:
+    """Row count and first/last ``time_s``: changes under any row subset or resample."""
+    t = df["time_s"].to_numpy()
+    if len(t) == 0:
+        return (0, float("nan"), float("nan"))
+    return (len(t), float(t[0]), float(t[-1]))
+
+
+def _median_interval(time_s: np.ndarray) -> float:
+    """Median spacing of a time axis in seconds (NaN for fewer than two samples)."""
+    return float(np.nanmedian(np.diff(time_s))) if len(time_s) > 1 else float("nan")
+
+
+def _n_samples(duration_s: float, dt: float) -> int:
+    """Samples needed to span ``duration_s``, rounded up (float noise in dt ignored)."""
+    return int(np.ceil(duration_s / dt - 1e-9))
+
+
+def _signal_windows(window_s: float, dt: float) -> tuple[int, int]:
+    """Rolling window and torque-baseline window, in samples, for compute_signals."""
+    win = max(_n_samples(window_s, dt), 5) if (dt and dt > 0) else 15
+    return win, max(win * 3, 30)
+
+
+def _min_event_samples(min_duration_s: float, dt: float) -> int:
+    """Run length, in samples, that detect_events requires for a sustained event."""
+    return max(_n_samples(min_duration_s, dt), 3) if (dt and dt > 0) else 5
+
+
+def lookback_samples(window_s: float, min_duration_s: float, dt: float) -> int:
+    """
+    Trailing samples that ``detect_events(compute_signals(df))`` reads behind a
+    row: the torque-baseline window, the MWD forward-fill and the sustained-event
+    run. A row range given this many preceding rows has every trailing window
+    fully populated at its first row, which is the halo batch.detect_chunked uses.
+    """
+    _, baseline_win = _signal_windows(window_s, dt)
+    return baseline_win + _MWD_FFILL_LIMIT + _min_event_samples(min_duration_s, dt)
+
+
+def _label_segments(flag: np.ndarray) -> np.ndarray:
+    """
+    Number contiguous True runs 1, 2, … (0 elsewhere). Every False→True edge
+    starts a new segment, so the running count of starts is the label.
+    """
+    starts = np.empty(len(flag), dtype=np.int32)
+    starts[:1] = flag[:1]
+    starts[1:] = flag[1:] & ~flag[:-1]
+    return np.where(flag, starts.cumsum(dtype=np.int32), 0)
+
+
+def _with_columns(df: pd.DataFrame, cols: dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Return ``df`` with ``cols`` attached as one new block via a single concat.
+
+    Columns that already exist (e.g. re-running a stage) are replaced; the input
+    frame and its ``attrs`` are left untouched.
+    """
+    new = pd.DataFrame(cols, index=df.index, copy=False)
+    out = pd.concat([df.drop(columns=df.columns.intersection(new.columns)), new], axis=1)
+    out.attrs = dict(df.attrs)
+    return out
+
+
+@dataclass(slots=True)
+class Signals:
+    """
+    Structure-of-arrays view of the channels the detection hot path reads.
+
+    from_df borrows the frame's arrays without copying when the dtypes already
+    match data_loader's output (float64 time, float32 sensors); treat them as
+    read-only.
+    """
+    time_s: np.ndarray
+    rpm: np.ndarray
+    torque: np.ndarray
+    mwd: np.ndarray | None = None
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> Signals:
+        return cls(
+            time_s=df["time_s"].to_numpy(dtype=np.float64, copy=False),
+            rpm=df["rpm"].to_numpy(dtype=np.float32, copy=False),
+            torque=df["torque_kNm"].to_numpy(dtype=np.float32, copy=False),
+            mwd=(
+                df["mwd_ss_pktopk"].to_numpy(dtype=np.float32, copy=False)
+                if "mwd_ss_pktopk" in df.columns else None
+            ),
+        )
+
 
 def compute_signals(
     df: pd.DataFrame,
     window_s: int = 60,
     min_rpm: float = 15.0,
+    dt: float | None = None,
 ) -> pd.DataFrame:
     """
     Compute all detection signals in one pass.
@@ -56,35 +188,78 @@ def compute_signals(
         Rolling window in seconds.
     min_rpm : float
         Minimum mean RPM to compute signals (exclude near-zero rows).
+    dt : float, optional
+        Sample interval in seconds. Measured from ``time_s`` when omitted; the
+        value used is cached in the returned frame's ``attrs["dt_s"]`` and
+        reused by later stages while the frame keeps the same rows.
+    """
+    # The arrays are computed off-frame and attached with a single concat,
+    # so the (possibly wide) input frame is never deep-copied
+    dt = _sample_interval(df, dt)
+    out = compute_signals_arr(Signals.from_df(df), window_s=window_s, min_rpm=min_rpm, dt=dt)
+    df = _with_columns(df, out)
+    _cache_interval(df, dt)
+    logger.info(
+        "Signals computed | CSS: max=%.3f p50=%.3f p95=%.3f | "
+        "MWD coverage: %.1f%% | torque spikes: %.1f%%",
+        df["css"].max(),
+        df["css"].quantile(0.50),
+        df["css"].quantile(0.95),
+        (df["mwd_ssi"] > 0).mean() * 100,
+        df["torque_spike"].mean() * 100,
+    )
+    return df
+
+
+def compute_signals_arr(
+    sig: Signals,
+    window_s: int = 60,
+    min_rpm: float = 15.0,
+    dt: float | None = None,
+) -> dict[str, np.ndarray]:
     """
-    df = df.copy()
+    Array core of compute_signals: returns the same columns as a dict of
+    NumPy arrays, without touching pandas. ``dt`` is measured from
+    ``sig.time_s`` when omitted.
+    """
+    out: dict[str, np.ndarray] = {}
 
-    dt = df["time_s"].diff().median()
-    win = max(int(window_s / dt), 5) if (dt and dt > 0) else 15
+    if dt is None:
+        dt = _median_interval(sig.time_s)
+    win, baseline_win = _signal_windows(window_s, dt)
     logger.info("Signal window: %d s → %d samples (dt=%.1f s)", window_s, win, dt)
 
-    rpm = df["rpm"].fillna(0.0)
-    torque = df["torque_kNm"].fillna(0.0)
+    # Signals are computed and stored in float32, the precision of the sensor
+    # channels from data_loader; the rolling kernels keep their state in float64
+    rpm_arr = np.nan_to_num(sig.rpm.astype(np.float32, copy=False), nan=0.0)
+    torque_arr = np.nan_to_num(sig.torque.astype(np.float32, copy=False), nan=0.0)
 
     # --- Surface RPM signals -------------------------------------------------
-    df["rpm_roll_mean"] = rpm.rolling(win, min_periods=5).mean()
-    df["rpm_roll_std"] = rpm.rolling(win, min_periods=5).std().fillna(0)
-
-    denom = df["rpm_roll_mean"].clip(lower=min_rpm)
-    df["rpm_ssi"] = df["rpm_roll_std"] / denom          # surface SSI (attenuated)
+    rpm_mean, rpm_std = rolling_mean_std(rpm_arr, win, 5)
+    np.nan_to_num(rpm_std, nan=0.0, copy=False)
+    out["rpm_roll_mean"] = rpm_mean
+    out["rpm_roll_std"] = rpm_std
+
+    # One RPM floor serves both the surface SSI and the MWD normalisation, and
+    # a single scratch buffer takes every other short-lived intermediate
+    denom = np.maximum(rpm_mean, min_rpm)
+    scratch = np.empty_like(denom)
+    rpm_ssi = rpm_std / denom                             # surface SSI (attenuated)
+    out["rpm_ssi"] = rpm_ssi
 
     # --- Surface Torque deviation signal ------------------------------------
     # Uses a longer window for the baseline to capture slow drift
-    baseline_win = max(win * 3, 30)
-    df["torque_baseline"] = (
-        torque.rolling(baseline_win, min_periods=10).median()
-    )
-    df["torque_roll_std"] = torque.rolling(win, min_periods=5).std().fillna(0)
-
-    baseline = df["torque_baseline"].clip(lower=0.5)
-    df["torque_deviation"] = (torque - df["torque_baseline"]) / baseline
-    df["torque_spike"] = (
-        torque > df["torque_baseline"] + _TORQUE_SPIKE_SIGMA * df["torque_roll_std"]
+    torque_baseline = rolling_median(torque_arr, baseline_win, 10)
+    torque_std = rolling_mean_std(torque_arr, win, 5)[1]
+    np.nan_to_num(torque_std, nan=0.0, copy=False)
+    out["torque_baseline"] = torque_baseline
+    out["torque_roll_std"] = torque_std
+
+    torque_dev = np.subtract(torque_arr, torque_baseline)
+    np.divide(torque_dev, np.maximum(torque_baseline, 0.5, out=scratch), out=torque_dev)
+    out["torque_deviation"] = torque_dev
+    out["torque_spike"] = spike_mask(
+        torque_arr, torque_baseline, torque_std, torque_std.dtype.type(_TORQUE_SPIKE_SIGMA)
     )
 
     # --- MWD Downhole signal -------------------------------------------------
@@ -92,60 +267,64 @@ def compute_signals(
     # This gives a physically meaningful dimensionless ratio (comparable to SSI).
     # A ratio of 0.3 (30% oscillation) = mild; 1.0+ = severe.
     # Clip to 0–2 then rescale to 0–1 for CSS weighting.
-    if "mwd_ss_pktopk" in df.columns:
-        mwd_raw = df["mwd_ss_pktopk"].fillna(0.0)
+    if sig.mwd is not None and not np.isnan(sig.mwd).all():
         # Normalise by rolling RPM mean; avoid division by near-zero
-        mwd_denom = df["rpm_roll_mean"].clip(lower=min_rpm)
-        df["mwd_ssi"] = (mwd_raw / mwd_denom).clip(0, 2) / 2.0  # maps 0-200% → 0-1
-        # Propagate MWD readings forward (MWD surveys transmitted at intervals)
-        df["mwd_ssi"] = df["mwd_ssi"].replace(0, np.nan).ffill(limit=8).fillna(0)
+        mwd_ssi = sig.mwd.astype(np.float32, copy=False) / denom
+        np.clip(mwd_ssi, 0.0, 2.0, out=mwd_ssi)
+        mwd_ssi *= 0.5                                       # maps 0-200% → 0-1
+        # Propagate MWD readings forward (MWD surveys transmitted at intervals).
+        # Missing readings stay NaN until here, so a genuine zero PKtoPK reading
+        # is kept as zero instead of being treated as a gap.
+        ffill_limit(mwd_ssi, _MWD_FFILL_LIMIT)
+        np.nan_to_num(mwd_ssi, nan=0.0, copy=False)
     else:
-        df["mwd_ssi"] = 0.0
+        # No MWD channel, or no survey in this window: the index is all zeros
+        mwd_ssi = np.zeros(len(rpm_arr), dtype=np.float32)
+    out["mwd_ssi"] = mwd_ssi
 
     # --- Composite Severity Score (CSS) --------------------------------------
     # MWD (60%) + surface torque deviation (30%) + surface RPM oscillation (10%)
-    torque_contrib = df["torque_deviation"].clip(0, 2) * 0.30 * 0.5  # max 0.30
-    mwd_contrib = df["mwd_ssi"] * 0.60
-    rpm_contrib = df["rpm_ssi"].clip(0, 2) * 0.10 * 0.5
-
-    df["css"] = (torque_contrib + mwd_contrib + rpm_contrib).clip(0, 1)
+    # Accumulated in place in one buffer plus the scratch array, so each input
+    # column is streamed once and no intermediate arrays are allocated.
+    css = np.clip(torque_dev, 0.0, 2.0)
+    css *= 0.30
+    css *= 0.5                                               # max 0.30
+    np.multiply(mwd_ssi, 0.60, out=scratch)
+    css += scratch
+    np.clip(rpm_ssi, 0.0, 2.0, out=scratch)
+    scratch *= 0.10
+    scratch *= 0.5
+    css += scratch
+    np.clip(css, 0.0, 1.0, out=css)
+    out["css"] = css
 
     # --- Severity label ------------------------------------------------------
-    conditions = [
-        df["css"] >= SEVERITY_MODERATE,
-        df["css"] >= SEVERITY_MILD,
-        df["css"] >= SEVERITY_STABLE,
-    ]
-    choices = ["SEVERE", "MODERATE", "MILD"]
-    df["severity_label"] = np.select(conditions, choices, default="STABLE")
+    # side="right" puts a CSS exactly on a threshold in the higher bucket;
+    # NaN would sort past every edge, so it is sent back to STABLE
+    level = np.searchsorted(_SEVERITY_EDGES, css, side="right")
+    level[np.isnan(css)] = 0
+    out["severity_label"] = _SEVERITY_LABELS[level]
 
     # Mask rows where the bit is not rotating
-    not_rotating = df["rpm_roll_mean"].fillna(0) < min_rpm
-    df.loc[not_rotating, ["rpm_ssi", "css"]] = np.nan
-
-    logger.info(
-        "Signals computed | CSS: max=%.3f p50=%.3f p95=%.3f | "
-        "MWD coverage: %.1f%% | torque spikes: %.1f%%",
-        df["css"].max(),
-        df["css"].quantile(0.50),
-        df["css"].quantile(0.95),
-        (df["mwd_ssi"] > 0).mean() * 100,
-        df["torque_spike"].mean() * 100,
-    )
-    return df
+    not_rotating = np.nan_to_num(rpm_mean, nan=0.0) < min_rpm
+    rpm_ssi[not_rotating] = np.nan
+    css[not_rotating] = np.nan
+    return out
 
 
 def detect_events(
     df: pd.DataFrame,
     css_threshold: float = SEVERITY_MILD,
     min_duration_s: float = 20.0,
+    dt: float | None = None,
 ) -> pd.DataFrame:
     """
     Label stick-slip events using the Composite Severity Score.
 
     An event is declared when CSS ≥ css_threshold for ≥ min_duration_s
     consecutive seconds. Each contiguous event segment receives a unique
-    integer event_id.
+    integer event_id. ``dt`` defaults to the sample interval cached by
+    compute_signals.
 
     Returns
     -------
@@ -154,32 +333,12 @@ def detect_events(
           stick_slip_flag  : bool
           event_id         : int (0 = no event)
     """
-    df = df.copy()
-
-    raw_flag = df["css"].fillna(0) >= css_threshold
-
-    dt = df["time_s"].diff().median()
-    min_samples = max(int(min_duration_s / dt), 3) if (dt and dt > 0) else 5
-
-    sustained = (
-        raw_flag.astype(int)
-        .rolling(min_samples, min_periods=min_samples)
-        .min()
-        .fillna(0)
-        .astype(bool)
-    )
-    df["stick_slip_flag"] = sustained
-
-    # Assign unique IDs to contiguous event segments
-    transitions = df["stick_slip_flag"].astype(int).diff().fillna(0)
-    event_id = 0
-    ids = np.zeros(len(df), dtype=int)
-    for loc, (df_idx, val) in enumerate(transitions.items()):
-        if val == 1:
-            event_id += 1
-        if df.loc[df_idx, "stick_slip_flag"]:
-            ids[loc] = event_id
-    df["event_id"] = ids
+    dt = _sample_interval(df, dt)
+    df = _with_columns(df, detect_events_arr(
+        df["css"].to_numpy(), dt,
+        css_threshold=css_threshold, min_duration_s=min_duration_s,
+    ))
+    _cache_interval(df, dt)
 
     n_events = int(df["event_id"].max())
     flagged_pct = float(df["stick_slip_flag"].mean() * 100)
@@ -190,36 +349,61 @@ def detect_events(
     return df
 
 
+def detect_events_arr(
+    css: np.ndarray,
+    dt: float,
+    css_threshold: float = SEVERITY_MILD,
+    min_duration_s: float = 20.0,
+) -> dict[str, np.ndarray]:
+    """Array core of detect_events: returns stick_slip_flag and event_id arrays."""
+    raw_flag = np.nan_to_num(css, nan=0.0) >= css_threshold
+    min_samples = _min_event_samples(min_duration_s, dt)
+
+    # Sustained once CSS has stayed above threshold for min_samples in a row
+    flag = run_length(raw_flag) >= min_samples
+
+    # Assign unique IDs to contiguous event segments
+    return {"stick_slip_flag": flag, "event_id": _label_segments(flag)}
+
+
 def compute_torsional_frequency(
     df: pd.DataFrame,
     segment_s: float = 300.0,
     target_column: str = "torque_kNm",
+    dt: float | None = None,
 ) -> dict[str, float]:
     """
     Estimate dominant torsional oscillation frequency via FFT of torque
-    signal during the most severe stick-slip event.
+    signal during the most severe stick-slip event. ``dt`` defaults to the
+    sample interval cached by compute_signals.
     """
-    events = df[df.get("stick_slip_flag", pd.Series(False, index=df.index))]
-    if events.empty:
+    flag = df.get("stick_slip_flag")
+    if flag is None or not flag.any():
         return {"dominant_freq_hz": 0.0, "period_s": 0.0, "oscillations_per_minute": 0.0}
 
-    peak_css_by_event = df[df["event_id"] > 0].groupby("event_id")["css"].max()
-    if peak_css_by_event.empty:
+    by_event = (
+        df[df["event_id"] > 0]
+        .groupby("event_id", sort=False)
+        .agg(peak_css=("css", "max"), t_start=("time_s", "first"))
+    )
+    if by_event.empty:
         return {"dominant_freq_hz": 0.0, "period_s": 0.0, "oscillations_per_minute": 0.0}
 
-    worst_event = int(peak_css_by_event.idxmax())
-    t_start = float(df[df["event_id"] == worst_event]["time_s"].iloc[0])
-    seg = df[
-        (df["time_s"] >= t_start) & (df["time_s"] <= t_start + segment_s)
-    ][target_column].dropna()
+    worst_event = int(by_event["peak_css"].idxmax())
+    t_start = float(by_event.at[worst_event, "t_start"])
+    # time_s is sorted by the loader, so the segment is a contiguous slice
+    times = df["time_s"].to_numpy()
+    i0 = np.searchsorted(times, t_start, side="left")
+    i1 = np.searchsorted(times, t_start + segment_s, side="right")
+    seg = df[target_column].iloc[i0:i1].dropna()
 
     if len(seg) < 16:
         return {"dominant_freq_hz": 0.0, "period_s": 0.0, "oscillations_per_minute": 0.0}
 
-    dt = float(df["time_s"].diff().median())
+    dt = _sample_interval(df, dt)
     signal = seg.values - seg.mean()
-    fft_mag = np.abs(np.fft.rfft(signal))
-    freqs = np.fft.rfftfreq(len(signal), d=dt)
+    fft_mag = np.abs(rfft(signal, n=len(signal), workers=-1))
+    freqs = rfftfreq(len(signal), d=dt)
 
     valid = (freqs > 0.005) & (freqs < 0.5)
     if not valid.any():
@@ -243,20 +427,32 @@ def validate_against_mwd(df: pd.DataFrame) -> dict[str, float]:
     if "mwd_ss_pktopk" not in df.columns:
         return {}
 
-    sub = df[df["mwd_ss_pktopk"].notna() & df["css"].notna()].copy()
-    if sub.empty:
+    # Work on the three columns involved rather than a filtered copy of the frame
+    css = df["css"].to_numpy(dtype=np.float64)
+    mwd = df["mwd_ss_pktopk"].to_numpy(dtype=np.float64)
+    flag = (
+        df["stick_slip_flag"].to_numpy(dtype=bool)
+        if "stick_slip_flag" in df.columns
+        else np.zeros(len(df), dtype=bool)
+    )
+    overlap = ~(np.isnan(css) | np.isnan(mwd))
+    css, mwd, flag = css[overlap], mwd[overlap], flag[overlap]
+    if css.size == 0:
         logger.warning("No overlapping CSS + MWD data.")
         return {}
 
-    mwd_norm = (sub["mwd_ss_pktopk"] / _MWD_MAX_PKTOPK).clip(0, 1)
-    pearson = float(np.corrcoef(sub["css"].values, mwd_norm.values)[0, 1])
+    mwd_norm = np.clip(mwd / _MWD_MAX_PKTOPK, 0.0, 1.0)
+    # Only the off-diagonal of corrcoef is needed: centre once, then three dots
+    dx = css - css.mean()
+    dy = mwd_norm - mwd_norm.mean()
+    den = np.sqrt((dx @ dx) * (dy @ dy))
+    pearson = float(dx @ dy / den) if den > 0 else 0.0
 
     mwd_positive = mwd_norm >= 0.1   # MWD PKtoPK ≥ 40 rpm = positive
-    ssi_positive = sub["stick_slip_flag"] if "stick_slip_flag" in sub.columns else pd.Series(False)
 
-    tp = int((ssi_positive & mwd_positive).sum())
-    fp = int((ssi_positive & ~mwd_positive).sum())
-    fn = int((~ssi_positive & mwd_positive).sum())
+    tp = int(np.count_nonzero(flag & mwd_positive))
+    fp = int(np.count_nonzero(flag & ~mwd_positive))
+    fn = int(np.count_nonzero(~flag & mwd_positive))
 
     precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
     recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
@@ -268,12 +464,12 @@ def validate_against_mwd(df: pd.DataFrame) -> dict[str, float]:
         "precision": round(precision, 4),
         "recall": round(recall, 4),
         "f1": round(f1, 4),
-        "n_samples": len(sub),
-        "mwd_mean_pktopk_rpm": round(float(sub["mwd_ss_pktopk"].mean()), 1),
-        "mwd_max_pktopk_rpm": round(float(sub["mwd_ss_pktopk"].max()), 1),
+        "n_samples": int(css.size),
+        "mwd_mean_pktopk_rpm": round(float(mwd.mean()), 1),
+        "mwd_max_pktopk_rpm": round(float(mwd.max()), 1),
     }
     logger.info(
         "MWD Validation | r=%.3f | P=%.2f | R=%.2f | F1=%.2f | n=%d",
-        pearson, precision, recall, f1, len(sub),
+        pearson, precision, recall, f1, css.size,
     )
     return metrics
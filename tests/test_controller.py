@@ -0,0 +1,185 @@
+"""
+Checks of the compiled controller against the per-row loop it replaced.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.controller import (
+    AutoDriller,
+    ControlAction,
+    ControllerConfig,
+    ControllerState,
+    ControllerTrace,
+    simulate_drillstring_response,
+)
+
+SEEDS = range(30)
+
+
+def _reference_run(driller: AutoDriller, df: pd.DataFrame) -> ControllerTrace:
+    """The original iterrows state machine, kept as the behavioural reference."""
+    cfg = driller.cfg
+    actions = []
+
+    t_window_end = df["time_s"].iloc[0] + 300.0
+    early = df[df["time_s"] <= t_window_end]
+    stable_early = early[early["css"].fillna(1.0) < cfg.ssi_engage]
+    if len(stable_early) >= 10:
+        driller._nominal_wob = float(stable_early["wob_kkgf"].median())
+        driller._nominal_rpm = float(stable_early["rpm"].median())
+    else:
+        driller._nominal_wob = float(df["wob_kkgf"].median())
+        driller._nominal_rpm = float(df["rpm"].median())
+    driller._nominal_wob = max(driller._nominal_wob, 2.0)
+    driller._nominal_rpm = max(driller._nominal_rpm, 30.0)
+    nom_wob, nom_rpm = driller._nominal_wob, driller._nominal_rpm
+
+    wob_sp, rpm_sp = nom_wob, nom_rpm
+    for _, row in df.iterrows():
+        ssi = row.get("css", np.nan)
+        t = float(row["time_s"])
+
+        if np.isnan(ssi):
+            actions.append(ControlAction(
+                time_s=t, state=driller._state,
+                wob_setpoint=wob_sp, rpm_setpoint=rpm_sp,
+                ssi_observed=0.0, action_taken="no_data",
+            ))
+            continue
+
+        action = "hold"
+        if driller._state == ControllerState.NORMAL:
+            wob_sp, rpm_sp = nom_wob, nom_rpm
+            if ssi >= cfg.ssi_engage:
+                driller._state = ControllerState.DETECTING
+                driller._detection_start_t = t
+                action = "event_detected"
+
+        elif driller._state == ControllerState.DETECTING:
+            if ssi < cfg.ssi_engage:
+                driller._state = ControllerState.NORMAL
+                action = "transient_cleared"
+            elif (t - driller._detection_start_t) >= cfg.detection_holdoff_s:
+                driller._state = ControllerState.MITIGATING
+                action = "mitigation_engaged"
+
+        elif driller._state == ControllerState.MITIGATING:
+            excess = max(0.0, ssi - cfg.ssi_engage)
+            wob_sp = max(nom_wob * cfg.wob_min_fraction, nom_wob - cfg.kp_wob * excess * nom_wob)
+            rpm_sp = min(nom_rpm + cfg.rpm_max_increase, nom_rpm + cfg.kp_rpm * excess * 10.0)
+            action = f"WOB↓{wob_sp:.1f} RPM↑{rpm_sp:.0f}"
+            if ssi < cfg.ssi_recovery:
+                driller._state = ControllerState.RECOVERING
+                driller._recovery_start_t = t
+                action = "recovery_phase"
+
+        elif driller._state == ControllerState.RECOVERING:
+            if ssi >= cfg.ssi_engage:
+                driller._state = ControllerState.MITIGATING
+                action = "relapse"
+            elif t - driller._recovery_start_t >= cfg.recovery_hold_s:
+                wob_sp = min(nom_wob, wob_sp + cfg.wob_ramp_rate * nom_wob)
+                rpm_sp = max(nom_rpm, rpm_sp - cfg.wob_ramp_rate * cfg.rpm_max_increase)
+                action = f"ramp_wob→{wob_sp:.1f}"
+                if wob_sp >= nom_wob * 0.98:
+                    rpm_sp = nom_rpm
+                    driller._state = ControllerState.NORMAL
+                    action = "fully_recovered"
+
+        actions.append(ControlAction(
+            time_s=t, state=driller._state,
+            wob_setpoint=wob_sp, rpm_setpoint=rpm_sp,
+            ssi_observed=ssi, action_taken=action,
+        ))
+
+    return ControllerTrace.from_actions(actions)
+
+
+def _reference_response(ctrl_df: pd.DataFrame, cfg: ControllerConfig):
+    """The original float64 forward-Euler loop of simulate_drillstring_response."""
+    dt_series = ctrl_df["time_s"].diff().fillna(4.0).clip(lower=0.5, upper=30.0)
+    n = len(ctrl_df)
+    sim_rpm, sim_torque, sim_rop = np.zeros(n), np.zeros(n), np.zeros(n)
+    k, c, I = cfg.drill_string_stiffness, cfg.bit_damping, cfg.inertia_drillstring
+
+    omega = float(ctrl_df["rpm_setpoint"].iloc[0]) * (2 * np.pi / 60.0)
+    theta_twist = 0.0
+    for i in range(n):
+        dt = float(dt_series.iloc[i])
+        wob = float(ctrl_df["wob_setpoint"].iloc[i])
+        omega_set = float(ctrl_df["rpm_setpoint"].iloc[i]) * (2 * np.pi / 60.0)
+        tau_bit = 0.55 * wob * 9.81 * 0.155
+        T_drive = k * 0.4 * (omega_set - omega) + c * 0.08 * omega_set
+        torque_net = T_drive - k * theta_twist - c * omega - tau_bit
+        alpha = np.clip(torque_net / I, -50.0, 50.0)
+        omega = max(0.0, omega + alpha * dt)
+        theta_twist = np.clip(theta_twist + (omega_set - omega) * dt, -5.0, 5.0)
+
+        sim_rpm[i] = omega * 60.0 / (2 * np.pi)
+        sim_torque[i] = max(0.0, abs(T_drive - tau_bit))
+        sim_rop[i] = 2.8 * (max(0.0, wob - 1.2) ** 0.6) * ((max(0.0, sim_rpm[i]) / 80.0) ** 0.4)
+
+    return {
+        "sim_rpm": np.clip(sim_rpm, 0, 300),
+        "sim_torque": np.clip(sim_torque, 0, 60),
+        "sim_rop": np.clip(sim_rop, 0, 200),
+    }
+
+
+def _scenario(rng, n):
+    """Telemetry whose CSS wanders across the engage/recovery thresholds."""
+    css = np.clip(np.cumsum(rng.normal(0, 0.06, n)) + rng.uniform(0.0, 0.4), 0.0, 1.0)
+    css[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        "time_s": np.cumsum(rng.choice([2.0, 4.0, 5.0], n)),
+        "css": css,
+        "wob_kkgf": rng.uniform(5.0, 15.0, n),
+        "rpm": rng.uniform(60.0, 160.0, n),
+    })
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_run_matches_reference_loop(seed):
+    rng = np.random.default_rng(seed)
+    cfg = ControllerConfig(
+        ssi_engage=rng.uniform(0.2, 0.4),
+        ssi_recovery=rng.uniform(0.05, 0.2),
+        detection_holdoff_s=rng.uniform(0.0, 40.0),
+        wob_ramp_rate=rng.uniform(0.005, 0.05),
+        recovery_hold_s=rng.uniform(0.0, 80.0),
+    )
+    df = _scenario(rng, int(rng.integers(50, 1500)))
+    # The second run() resumes from the state the first one ended in
+    split = int(rng.integers(1, len(df)))
+    compiled, reference = AutoDriller(cfg), AutoDriller(cfg)
+    for part in (df.iloc[:split], df.iloc[split:]):
+        got = compiled.run(part).to_dataframe()
+        expected = _reference_run(reference, part).to_dataframe()
+        pd.testing.assert_frame_equal(got, expected)
+        assert compiled._state == reference._state
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_integrator_matches_float64_loop(seed):
+    rng = np.random.default_rng(seed)
+    cfg = ControllerConfig()
+    df = _scenario(rng, int(rng.integers(50, 3000)))
+    ctrl_df = AutoDriller(cfg).run(df).to_dataframe()
+    got = simulate_drillstring_response(ctrl_df, df, cfg)
+    # The compiled integrator runs in float32; the reference is the float64 loop
+    for col, expected in _reference_response(ctrl_df, cfg).items():
+        np.testing.assert_allclose(got[col].to_numpy(dtype=np.float64), expected,
+                                   rtol=1e-4, atol=1e-4, err_msg=col)
+
+
+def test_to_dataframe_edits_do_not_touch_the_trace():
+    df = _scenario(np.random.default_rng(0), 200)
+    trace = AutoDriller().run(df)
+    before = trace.actions
+    ctrl_df = trace.to_dataframe()
+    ctrl_df["state"] = "EDITED"
+    ctrl_df.loc[0, "wob_setpoint"] = -1.0
+    assert trace.actions == before
+    assert (trace.frame["state"] != "EDITED").all()
@@ -0,0 +1,26 @@
+"""
+Randomised checks of the data_loader kernels against the pandas operations
+they replace.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader import _interpolate_limit
+
+SEEDS = range(5)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_interpolate_limit_matches_pandas(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        n = int(rng.integers(1, 500))
+        limit = int(rng.integers(1, 20))
+        x = rng.normal(size=n).astype(np.float32)
+        x[rng.random(n) < rng.uniform(0.1, 0.9)] = np.nan
+        expected = pd.Series(x).interpolate(method="linear", limit=limit).to_numpy()
+        got = _interpolate_limit(x, limit)
+        assert got.dtype == np.float32
+        np.testing.assert_allclose(got, expected, rtol=1e-6, atol=1e-6)
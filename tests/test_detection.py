@@ -0,0 +1,77 @@
+"""
+Checks of the detection helpers against straightforward NumPy/pandas
+references.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.detection import _label_segments, compute_torsional_frequency
+
+SEEDS = range(5)
+
+
+def _reference_labels(flag):
+    """The original per-row loop: a new id at every False→True transition."""
+    transitions = pd.Series(flag.astype(int)).diff().fillna(0)
+    ids = np.zeros(len(flag), dtype=int)
+    event_id = 0
+    for i, val in enumerate(transitions):
+        if val == 1:
+            event_id += 1
+        if flag[i]:
+            ids[i] = event_id
+    return ids
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_label_segments_matches_reference_loop(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        n = int(rng.integers(2, 2000))
+        # Runs of random length, so segments of one sample and long events mix
+        flag = np.repeat(rng.random(n) < 0.4, rng.integers(1, 30, n))[:n]
+        flag[0] = False                     # see the first-row test below
+        labels = _label_segments(flag)
+        assert labels.dtype == np.int32
+        np.testing.assert_array_equal(labels, _reference_labels(flag))
+
+
+def test_label_segments_numbers_a_run_starting_on_the_first_row():
+    # The old loop left this run at 0; every True run now gets its own id
+    flag = np.array([True, True, False, True, False, False, True])
+    np.testing.assert_array_equal(_label_segments(flag), [1, 1, 0, 2, 0, 0, 3])
+    np.testing.assert_array_equal(_label_segments(np.zeros(0, dtype=bool)), [])
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_torsional_frequency_uses_unpadded_segment(seed):
+    rng = np.random.default_rng(seed)
+    dt = 4.0
+    for _ in range(20):
+        # Segment lengths around 2/3/5-smooth sizes, where padding would move the peak
+        n = int(rng.integers(120, 400))
+        start = int(rng.integers(0, n - 80))
+        length = int(rng.integers(16, 80))
+        flag = np.zeros(n, dtype=bool)
+        flag[start:start + length] = True
+        t = np.arange(n) * dt
+        torque = np.sin(2 * np.pi * rng.uniform(0.01, 0.12) * t) + rng.normal(0, 0.3, n)
+        df = pd.DataFrame({
+            "time_s": t,
+            "torque_kNm": torque,
+            "css": rng.random(n),
+            "stick_slip_flag": flag,
+            "event_id": flag.astype(np.int32),
+        })
+
+        seg = df["torque_kNm"][(t >= t[start]) & (t <= t[start] + 300.0)]
+        signal = seg.to_numpy() - seg.mean()
+        freqs = np.fft.rfftfreq(len(signal), d=dt)
+        mag = np.abs(np.fft.rfft(signal))
+        valid = (freqs > 0.005) & (freqs < 0.5)
+        expected = round(float(freqs[valid][np.argmax(mag[valid])]), 5)
+
+        result = compute_torsional_frequency(df, dt=dt)
+        assert result["dominant_freq_hz"] == expected
@@ -0,0 +1,122 @@
+"""
+Randomised checks of the hand-written Numba kernels against the pandas
+operations they replace.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src._kernels import (
+    _rolling_median_heaps,
+    _rolling_median_sorted,
+    ffill_limit,
+    rolling_mean_std,
+    rolling_median,
+    run_length,
+    spike_mask,
+)
+
+SEEDS = range(5)
+
+
+def _signal(rng, n, nan_frac=0.2):
+    """Continuous or heavily tied samples with randomly placed NaN gaps."""
+    if rng.random() < 0.5:
+        x = rng.normal(size=n)
+    else:
+        x = rng.integers(0, 8, n).astype(np.float64)
+    x[rng.random(n) < nan_frac] = np.nan
+    return x
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_run_length_matches_rolling_min(seed):
+    rng = np.random.default_rng(seed)
+    flag = rng.random(1000) < 0.7
+    runs = run_length(flag)
+    for w in (1, 3, 10):
+        expected = pd.Series(flag.astype(float)).rolling(w).min().to_numpy() == 1.0
+        np.testing.assert_array_equal(runs >= w, expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_rolling_mean_std_matches_pandas(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        n = int(rng.integers(1, 2000))
+        w = int(rng.integers(1, 200))
+        min_p = int(rng.integers(1, w + 1))
+        # Offset signal: the case the sum-of-squares shortcut gets wrong
+        x = rng.normal(size=n) * 3 + rng.choice([0.0, 1e4])
+        x[rng.random(n) < 0.1] = np.nan
+        roll = pd.Series(x).rolling(w, min_periods=min_p)
+        mean, std = rolling_mean_std(x, w, min_p)
+        np.testing.assert_allclose(mean, roll.mean().to_numpy(), rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(std, roll.std().to_numpy(), rtol=1e-6, atol=1e-7)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_rolling_std_is_exactly_zero_on_constant_windows(seed):
+    rng = np.random.default_rng(seed)
+    n = 3000
+    x = np.repeat(rng.integers(0, 4, n // 50 + 1) * 7.1, 50)[:n]
+    x[rng.random(n) < 0.1] = np.nan
+    for w in (5, 30, 120):
+        # Checked against the window contents: pandas' own accumulator can
+        # leave a ~1e-7 residue on a constant window after a level change
+        roll = pd.Series(x).rolling(w, min_periods=2)
+        constant = (roll.max() == roll.min()).to_numpy() & (roll.count() >= 2).to_numpy()
+        _, std = rolling_mean_std(x, w, 2)
+        np.testing.assert_array_equal(std == 0.0, constant)
+        np.testing.assert_array_equal(np.isnan(std), np.isnan(roll.std().to_numpy()))
+
+
+def test_rolling_mean_std_keeps_float32():
+    x = np.arange(100, dtype=np.float32)
+    mean, std = rolling_mean_std(x, 10, 5)
+    assert mean.dtype == np.float32 and std.dtype == np.float32
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_ffill_limit_matches_pandas(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        n = int(rng.integers(1, 500))
+        limit = int(rng.integers(1, 20))
+        x = _signal(rng, n, nan_frac=rng.uniform(0.1, 0.9))
+        expected = pd.Series(x).ffill(limit=limit).to_numpy()
+        ffill_limit(x, limit)
+        np.testing.assert_array_equal(x, expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize(
+    "median", [_rolling_median_sorted, _rolling_median_heaps, rolling_median],
+)
+def test_rolling_median_matches_pandas(median, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        n = int(rng.integers(1, 600))
+        w = int(rng.integers(1, 300))
+        min_p = int(rng.integers(1, w + 1))
+        x = _signal(rng, n)
+        expected = pd.Series(x).rolling(w, min_periods=min_p).median().to_numpy()
+        np.testing.assert_array_equal(median(x, w, min_p), expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_spike_mask_matches_numpy_expression(seed):
+    rng = np.random.default_rng(seed)
+    n = 5000
+    baseline = rng.uniform(0.0, 20.0, n).astype(np.float32)
+    spread = rng.uniform(0.0, 3.0, n).astype(np.float32)
+    k = np.float32(1.5)
+    # Half the samples land exactly on the threshold, where rounding decides
+    x = np.where(rng.random(n) < 0.5, baseline + k * spread,
+                 rng.uniform(0.0, 30.0, n)).astype(np.float32)
+    for arr in (x, baseline, spread):
+        arr[rng.random(n) < 0.05] = np.nan
+    got = spike_mask(x, baseline, spread, k)
+    assert got.dtype == np.bool_
+    np.testing.assert_array_equal(got, x > baseline + k * spread)
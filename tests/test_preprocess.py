@@ -0,0 +1,31 @@
+"""
+Checks of the preprocess.py helpers against the pandas operations they replace.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocess import _event_peak_rows
+
+SEEDS = range(5)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_event_peak_rows_matches_groupby_idxmax(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        n = int(rng.integers(1, 2000))
+        # Events need not be contiguous or in id order; CSS has ties and NaNs
+        event_ids = rng.integers(0, 12, n).astype(np.int32)
+        css = rng.integers(0, 6, n) / 5.0
+        css[rng.random(n) < 0.1] = np.nan
+        df = pd.DataFrame({"event_id": event_ids, "css": css})
+        # Events are only flagged on finite CSS, so every event has a valid peak
+        df = df[df.groupby("event_id")["css"].transform("count") > 0].reset_index(drop=True)
+
+        expected = (
+            df[df["event_id"] > 0].groupby("event_id", sort=True)["css"].idxmax().to_numpy()
+        )
+        got = _event_peak_rows(df["event_id"].to_numpy(), df["css"].to_numpy())
+        np.testing.assert_array_equal(got, expected)
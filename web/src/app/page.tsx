@@ -1,4 +1,5 @@
-import type { TelemetryRow, DrillingEvent, Metadata } from "@/lib/types";
+import type { TelemetryColumns, DrillingEvent, Metadata } from "@/lib/types";
+import { telemetryRows } from "@/lib/utils";
 import MetricsBar from "@/components/MetricsBar";
 import InsightBanner from "@/components/InsightBanner";
 import PageTabs from "@/components/PageTabs";
@@ -13,7 +14,7 @@ async function getData() {
     readFile(path.join(dir, "metadata.json"), "utf-8"),
   ]);
   return {
-    telemetry: JSON.parse(t) as TelemetryRow[],
+    telemetry: telemetryRows(JSON.parse(t) as TelemetryColumns),
     events: JSON.parse(e) as DrillingEvent[],
     metadata: JSON.parse(m) as Metadata,
   };
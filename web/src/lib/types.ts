@@ -27,6 +27,9 @@ export interface TelemetryRow {
   sim_rop: number | null;
 }
 
+/** telemetry.json is column-oriented: one array per TelemetryRow field. */
+export type TelemetryColumns = { [K in keyof TelemetryRow]: TelemetryRow[K][] };
+
 export interface DrillingEvent {
   event_id: number;
   start_elapsed_s: number;
@@ -1,4 +1,9 @@
-import type { SeverityLabel, ControllerState } from "./types";
+import type {
+  SeverityLabel,
+  ControllerState,
+  TelemetryColumns,
+  TelemetryRow,
+} from "./types";
 
 // ---------------------------------------------------------------------------
 // Time formatting
@@ -81,3 +86,20 @@ export function downsample<T>(arr: T[], targetPoints: number): T[] {
   const step = Math.ceil(arr.length / targetPoints);
   return arr.filter((_, i) => i % step === 0);
 }
+
+// ---------------------------------------------------------------------------
+// Telemetry payload
+// ---------------------------------------------------------------------------
+
+/** Expand the column-oriented telemetry.json payload into per-row objects. */
+export function telemetryRows(cols: TelemetryColumns): TelemetryRow[] {
+  const keys = Object.keys(cols) as (keyof TelemetryRow)[];
+  const n = keys.length > 0 ? cols[keys[0]].length : 0;
+  const rows = new Array<TelemetryRow>(n);
+  for (let i = 0; i < n; i++) {
+    const row: Record<string, unknown> = {};
+    for (const k of keys) row[k] = cols[k][i];
+    rows[i] = row as unknown as TelemetryRow;
+  }
+  return rows;
+}